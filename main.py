@@ -1,14 +1,25 @@
 import asyncio
-import aiohttp
-import aiofiles
+import httpx
+import charset_normalizer
 import os
-import json
-import re
+import random
 import logging
-import gzip
+import zlib
+from lxml import etree, html as lhtml
 from parsel import Selector
+from parsel.csstranslator import HTMLTranslator
+from cssselect import SelectorError, parse as parse_css
+from cssselect.parser import Attrib, Class, CombinedSelector, Element, Function, Hash, Pseudo
 from urllib.parse import urljoin
 from rule_manager import RuleManager  # 确保 rule_manager.py 在同级目录
+from storage import StorageHandler
+
+# HTTP/2 需要额外安装 h2 (pip install "httpx[http2]")，没装时退回 HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
 
 # ==========================================
 # 🔧 配置区域 (Configuration Area)
@@ -17,107 +28,318 @@ from rule_manager import RuleManager  # 确保 rule_manager.py 在同级目录
 # === 日志配置 (比 print 更专业) ===
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
+# httpx 每个请求都会打一条 INFO 日志，和章节日志重复，只保留警告以上
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 # === 全局配置 ===
 CONCURRENCY = 5  # 并发数: 同时下载5章 (建议不要超过10，以免被封)
 DELAY = 0.5      # 每次请求后的礼貌延迟 (秒)
 RETRIES = 3      # 失败重试次数
+BACKOFF = 0.25   # 重试退避基数 (秒): 第 i 次重试等待 BACKOFF * 2**i + 随机抖动
 
 # === 请求头 ==
 headers = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Encoding": "gzip, deflate",
 }
 
+# === 流式下载目录页时每次读取的块大小 ===
+STREAM_CHUNK_SIZE = 128 * 1024
+
+# === 手动解压的上限 (防止异常大的 gzip 包撑爆内存) ===
+MAX_GUNZIP_SIZE = 16 * 1024 * 1024
+
+# === 目录页解析器 (已解码的文本统一转成 utf-8 字节再交给 lxml) ===
+_utf8_html_parser = lhtml.HTMLParser(encoding='utf-8')
+
+# === CSS -> XPath 转换器 (parsel 同款，支持 ::text / ::attr) ===
+_css_translator = HTMLTranslator()
+
 # ==========================================
 # 🛠️ 核心逻辑 (Core Logic)
 # ==========================================
 
 
 
-def clean_filename(filename):
-    """清洗文件名，移除 Windows/Linux 不允许的字符"""
-    return re.sub(r'[\\/*?:"<>|]', "", filename).strip()
+def gunzip_if_needed(raw):
+    """兜底: 服务器返回了 gzip 数据却没有声明 Content-Encoding 时，手动流式解压"""
+    # gzip 魔数: 0x1f 0x8b
+    if raw[:2] != b'\x1f\x8b':
+        return raw
+    d = zlib.decompressobj(wbits=31)  # 31 = gzip 头
+    try:
+        out = d.decompress(raw, MAX_GUNZIP_SIZE)
+        if d.unconsumed_tail:
+            logger.warning("⚠️ gzip 解压后超过 %d 字节，保留原始数据", MAX_GUNZIP_SIZE)
+            return raw
+        return out + d.flush()
+    except zlib.error as e:
+        logger.warning("⚠️ gzip 解压失败: %s", e)
+        return raw
+
+def decode_html(raw, encoding='auto'):
+    """字节解码为字符串: 指定编码优先；否则先试 utf-8 / gb18030 严格解码，都失败才用 charset_normalizer 检测"""
+    if encoding != 'auto':
+        # 使用指定编码 (严格解码，配置写错时退回自动检测，而不是存一堆乱码)
+        try:
+            return raw.decode(encoding)
+        except (UnicodeDecodeError, LookupError):
+            logger.warning("⚠️ 使用指定编码 %s 失败，尝试自动检测...", encoding)
+
+    # 快速路径: 严格解码遇到第一个非法字节就失败，不必扫描整页
+    # (gb18030 是 gbk/gb2312 的超集，覆盖绝大多数中文站)
+    for enc in ('utf-8', 'gb18030'):
+        try:
+            return raw.decode(enc)
+        except UnicodeDecodeError:
+            continue
+
+    # 兜底: 自动检测 (慢，只在上面都失败时使用)
+    best = charset_normalizer.from_bytes(raw).best()
+    if best is None:
+        # 检测失败，用 utf-8 忽略错误
+        return raw.decode('utf-8', errors='ignore')
+
+    # gb18030 是 gbk/gb2312 的超集，直接提升，避免生僻字解码失败
+    enc = best.encoding
+    if enc in ('gbk', 'gb2312'):
+        enc = 'gb18030'
+    return raw.decode(enc, errors='replace')
+
+def compile_toc_xpath(rules):
+    """编译目录页链接的 XPath: 优先用 chapter_list_xpath，否则由 chapter_list (CSS) 转换"""
+    xpath = rules.get("chapter_list_xpath")
+    if not xpath:
+        css_xpath = _css_translator.css_to_xpath(rules["chapter_list"])
+        xpath = f"({css_xpath})/@{rules['chapter_link_attr']}"
+    return etree.XPath(xpath)
+
+# 只依赖"已解析部分"的 CSS 伪类: 节点一出现就能确定是否匹配，之后不会变
+_STREAM_SAFE_PSEUDOS = {'first-child', 'first-of-type'}
+_STREAM_SAFE_FUNCTIONS = {'nth-child', 'nth-of-type'}
+
+def _css_is_stream_safe(node):
+    """检查 CSS 语法树只用到标签/类/ID/属性/向前看的伪类和组合符"""
+    if isinstance(node, Element):
+        return True
+    if isinstance(node, (Class, Hash, Attrib)):
+        return _css_is_stream_safe(node.selector)
+    if isinstance(node, CombinedSelector):
+        # ' ' '>' '+' '~' 都只看祖先或前面的兄弟节点
+        return _css_is_stream_safe(node.selector) and _css_is_stream_safe(node.subselector)
+    if isinstance(node, Pseudo):
+        return node.ident in _STREAM_SAFE_PSEUDOS and _css_is_stream_safe(node.selector)
+    if isinstance(node, Function):
+        return node.name in _STREAM_SAFE_FUNCTIONS and _css_is_stream_safe(node.selector)
+    # :last-child / :empty / :not() / :contains() 等要等后面的内容才能确定
+    return False
+
+def toc_is_stream_safe(rules):
+    """
+    目录规则能否边解析边产出链接: 要求已出现的节点匹配结果不随后续内容改变
+    chapter_list_xpath 无法可靠判断，一律等整页解析完再产出
+    """
+    if rules.get("chapter_list_xpath"):
+        return False
+    try:
+        selectors = parse_css(rules["chapter_list"])
+    except SelectorError:
+        return False
+    return all(sel.pseudo_element is None and _css_is_stream_safe(sel.parsed_tree) for sel in selectors)
+
+def compile_chapter_rules(rules):
+    """启动时把章节页的 CSS 规则预编译成 XPath，返回新字典 (不改动缓存中的原始配置)"""
+    compiled = dict(rules)
+    compiled["_title_xp"] = _css_translator.css_to_xpath(rules["chapter_title"])
+    compiled["_content_xp"] = _css_translator.css_to_xpath(rules["chapter_content"])
+    return compiled
+
+def parse_toc(toc_html, toc_xpath):
+    """用 lxml 一次性取出目录页所有章节链接 (字符串列表)"""
+    # 按 utf-8 字节解析: 直接传 str 时，带 <?xml encoding=...?> 声明的页面会让 lxml 报错
+    tree = lhtml.document_fromstring(toc_html.encode('utf-8'), parser=_utf8_html_parser)
+    return [str(href) for href in toc_xpath(tree)]
 
 async def fetch(session, url, encoding='auto'):
-    """通用请求函数 (带基础重试)"""
+    """通用请求函数 (网络异常/5xx/429 时指数退避重试，其他状态码直接放弃)"""
     for i in range(RETRIES):
         try:
-            async with session.get(url, headers=headers, timeout=15) as response:
-                if response.status == 200:
-                    # 读取原始字节
-                    raw = await response.read()
-                    
-                    # 检查是否是 gzip 压缩 (魔数: 0x1f 0x8b)
-                    if raw[:2] == b'\x1f\x8b':
-                        try:
-                            raw = gzip.decompress(raw)
-                        except Exception as e:
-                            print(f"⚠️ gzip 解压失败: {e}")
-                    
-                    # 解码为字符串
-                    if encoding != 'auto':
-                        # 使用指定编码
-                        try:
-                            return raw.decode(encoding)
-                        except (UnicodeDecodeError, LookupError):
-                            print(f"⚠️ 使用指定编码 {encoding} 失败，尝试自动检测...")
-                    
-                    # 自动尝试多种编码
-                    for enc in ('utf-8', 'gb18030', 'gbk', 'gb2312', 'big5'):
-                        try:
-                            text = raw.decode(enc)
-                            return text
-                        except (UnicodeDecodeError, LookupError):
-                            continue
-                    
-                    # 都失败了，用 utf-8 忽略错误
-                    return raw.decode('utf-8', errors='ignore')
-                else:
-                    print(f"⚠️ 请求失败 [{response.status}]: {url}")
-                    return None
+            response = await session.get(url)
+            if response.status_code == 200:
+                # 字节内容 (httpx 已按 Content-Encoding 解压 gzip/deflate)
+                raw = gunzip_if_needed(response.content)
+                
+                # 按站点配置的编码解码，而不是依赖响应头里的 charset
+                return decode_html(raw, encoding)
+            elif response.status_code >= 500 or response.status_code == 429:
+                # 服务器繁忙/限流: 值得重试
+                logger.warning("⚠️ 请求失败 [%s] (第%d次): %s", response.status_code, i + 1, url)
+            else:
+                # 404 等: 重试也没用
+                logger.warning("⚠️ 请求失败 [%s]: %s", response.status_code, url)
+                return None
         except Exception as e:
-            print(f"❌ 连接异常 (第{i+1}次): {url} - {e}")
-        await asyncio.sleep(1) # 失败后稍微等一下再重试
+            logger.error("❌ 连接异常 (第%d次): %s - %s", i + 1, url, e)
+        if i + 1 < RETRIES:
+            # 指数退避 + 抖动，避免并发协程同时重试
+            await asyncio.sleep(BACKOFF * (2 ** i) + random.random() * BACKOFF)
     return None
 
-async def save_chapter(novel_dir, chapter_idx, title, content):
-    """保存章节到文件"""
-    # 文件名格式: 0001_第一章.txt (加入序号方便排序)
-    filename = f"{chapter_idx:04d}_{clean_filename(title)}.txt"
-    filepath = os.path.join(novel_dir, filename)
+class TocUnavailableError(Exception):
+    """目录页无法访问 (与"目录里没有章节"区分开)"""
 
+async def fetch_toc_stream(session, url, toc_xpath, encoding='auto', emit_early=True):
+    """
+    流式获取目录页: 边下载边用 HTMLPullParser 增量解析，发现章节链接立即产出 (序号, href)
+    序号从 1 开始；流式失败时退回 fetch() 整页下载，并跳过已经产出的链接
+    一个链接都没拿到就访问失败时抛出 TocUnavailableError
+    emit_early=False 时 (规则依赖后续内容，见 toc_is_stream_safe) 仍增量解析，但整页解析完才产出
+    """
+    emitted = 0
+    early_hrefs = []
     try:
-        async with aiofiles.open(filepath, 'w', encoding='utf-8') as f:
-            await f.write(title + "\n\n")
-            await f.write(content)
+        parser = etree.HTMLPullParser(events=("start",), encoding=None if encoding == 'auto' else encoding)
+        root = None
+        gunzip = None
+        gunzip_size = 0
+        async with session.stream("GET", url) as response:
+            if 400 <= response.status_code < 500 and response.status_code != 429:
+                # 404 等: 整页重试也没用
+                raise TocUnavailableError(f"目录页返回 [{response.status_code}]: {url}")
+            if response.status_code != 200:
+                raise httpx.HTTPStatusError(
+                    f"状态码 {response.status_code}", request=response.request, response=response
+                )
+            async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                # 兜底: 未声明 Content-Encoding 的 gzip 数据，改用解压流逐块解压
+                if gunzip is None:
+                    gunzip = zlib.decompressobj(wbits=31) if chunk[:2] == b'\x1f\x8b' else False
+                if gunzip:
+                    chunk = gunzip.decompress(chunk, MAX_GUNZIP_SIZE - gunzip_size + 1)
+                    gunzip_size += len(chunk)
+                    if gunzip.unconsumed_tail or gunzip_size > MAX_GUNZIP_SIZE:
+                        raise ValueError(f"gzip 解压后超过 {MAX_GUNZIP_SIZE} 字节")
+                parser.feed(chunk)
+                
+                # 第一个 start 事件就是根节点，之后只需要清空事件队列
+                for _, elem in parser.read_events():
+                    if root is None:
+                        root = elem
+                if root is None or not emit_early:
+                    continue
+                
+                # 新解析出的节点总是排在文档末尾，且规则只看已解析的内容 (toc_is_stream_safe)，
+                # 所以只产出上次之后新增的链接
+                hrefs = toc_xpath(root)
+                for href in hrefs[emitted:]:
+                    emitted += 1
+                    early_hrefs.append(str(href))
+                    yield emitted, early_hrefs[-1]
+            
+            if gunzip:
+                tail = gunzip.flush()
+                if gunzip_size + len(tail) > MAX_GUNZIP_SIZE:
+                    raise ValueError(f"gzip 解压后超过 {MAX_GUNZIP_SIZE} 字节")
+                parser.feed(tail)
+            parser.close()
+            for _, elem in parser.read_events():
+                if root is None:
+                    root = elem
+            if root is not None:
+                hrefs = [str(href) for href in toc_xpath(root)]
+                if hrefs[:emitted] != early_hrefs:
+                    logger.warning("⚠️ 目录规则的匹配结果在解析过程中发生了变化，章节可能遗漏或序号错位: %s", url)
+                for href in hrefs[emitted:]:
+                    emitted += 1
+                    yield emitted, href
+        return
+    except TocUnavailableError:
+        raise
     except Exception as e:
-        logger.error(f"文件写入失败: {filename} - {e}")
+        logger.warning("⚠️ 目录页流式解析失败，改为整页下载: %s - %s", url, e)
+    
+    # 退回: 整页下载 (带重试) 后一次性解析
+    toc_html = await fetch(session, url)
+    if not toc_html:
+        if not emitted:
+            raise TocUnavailableError(f"目录页下载失败: {url}")
+        # 已经产出的章节仍在下载，只提示目录不完整
+        logger.error("❌ 目录页只读取到 %d 个章节就中断了: %s", emitted, url)
+        return
+    for href in parse_toc(toc_html, toc_xpath)[emitted:]:
+        emitted += 1
+        yield emitted, href
 
-async def download_chapter(session, url, idx, rules, encoding, semaphore, novel_dir):
+def parse_chapter(html, rules):
+    """解析章节页，返回 (标题, 段落列表)"""
+    sel = Selector(text=html)
+    title = sel.xpath(rules["_title_xp"]).get()
+    content_lines = sel.xpath(rules["_content_xp"]).getall()
+    return title, content_lines
+
+async def download_chapter(session, url, idx, rules, encoding, storage):
     """下载单个章节的工作单元"""
-    async with semaphore:  # 限制并发
-        print(f"⏳ [{idx}] 正在下载: {url} ...")
-        html = await fetch(session, url, encoding)
-        if not html:
-            print(f"⚠️ [{idx}] 正文获取失败: {url} ...")
-            return
-        
-        sel = Selector(text=html)
-        
-        # 解析标题和内容
-        title = sel.css(rules["chapter_title"]).get()
-        # 获取所有段落并拼接
-        content_lines = sel.css(rules["chapter_content"]).getall()
-        # 清洗数据: 去除首尾空格，用换行符连接
-        content = "\n".join([line.strip() for line in content_lines if line.strip()])
-        
-        if title and content:
-            await save_chapter(novel_dir, idx, title, content)
-            print(f"✅ [{idx}] 保存成功: {title}")
-        else:
-            print(f"⚠️ [{idx}] 解析失败 (可能是规则错误或反爬): {url}")
-        
-        await asyncio.sleep(DELAY) # 礼貌性延迟
+    logger.info("⏳ [%d] 正在下载: %s ...", idx, url)
+    html = await fetch(session, url, encoding)
+    if not html:
+        logger.warning("⚠️ [%d] 正文获取失败: %s ...", idx, url)
+        return
+    
+    # 解析交给线程池，lxml 解析期间不阻塞其他下载协程
+    title, content_lines = await asyncio.to_thread(parse_chapter, html, rules)
+    # 清洗数据: 每行只 strip 一次，丢弃空行，用换行符连接 (生成器，不建中间列表)
+    content = "\n".join(line for line in map(str.strip, content_lines) if line)
+    
+    if title and content:
+        # 由 StorageHandler 写文件并更新断点续传索引
+        await storage.save_chapter(idx, title, content, url)
+    else:
+        logger.warning("⚠️ [%d] 解析失败 (可能是规则错误或反爬): %s", idx, url)
+    
+    await asyncio.sleep(DELAY) # 礼貌性延迟
+
+async def worker(queue, session, rules, encoding, storage):
+    """下载协程: 不断从队列取章节，收到 None 时退出 (固定 CONCURRENCY 个，自带限流)"""
+    while True:
+        item = await queue.get()
+        try:
+            if item is None:
+                return
+            idx, url = item
+            await download_chapter(session, url, idx, rules, encoding, storage)
+        except Exception as e:
+            logger.error("❌ [%d] 下载异常: %s - %s", idx, url, e)
+        finally:
+            queue.task_done()
+
+async def collect_toc(session, toc_url, rules, encoding, storage, queue, worker_count):
+    """
+    目录读取任务: 按网络速度读完目录页，把待下载章节放入队列，不受下载进度影响
+    (目录响应尽快读完并释放连接)；结束时给每个下载协程发一个结束信号
+    返回 (目录章节总数, 已下载跳过数)
+    """
+    total = skipped = 0
+    try:
+        toc_xpath = compile_toc_xpath(rules)
+        emit_early = toc_is_stream_safe(rules)
+        async for idx, href in fetch_toc_stream(session, toc_url, toc_xpath, encoding, emit_early):
+            total += 1
+            if not href: continue
+            
+            # 补全 URL
+            full_url = urljoin(toc_url, href)
+            
+            # 断点续传: 已下载过的章节不再调度
+            if storage.is_downloaded(full_url):
+                skipped += 1
+                continue
+            
+            queue.put_nowait((idx, full_url))
+    finally:
+        # 每个下载协程一个结束信号
+        for _ in range(worker_count):
+            queue.put_nowait(None)
+    return total, skipped
 
 async def main():
     # 1. 输入目标
@@ -130,74 +352,88 @@ async def main():
     site_config = manager.get_rule_by_url(TARGET_URL)
 
     if not site_config:
-        print("程序终止：没有找到对应的网站规则，请先在 sites.yaml 中配置。")
+        logger.error("程序终止：没有找到对应的网站规则，请先在 sites.yaml 中配置。")
         return
     else:
         # 从配置中提取具体规则
-        rules = site_config['rules']
+        rules = compile_chapter_rules(site_config['rules'])
         encoding = site_config.get('encoding', 'utf-8')
 
     """主调度器"""
-    print(f"🚀 启动爬虫，目标: {NOVEL_NAME}")
-    
-    # 1. 创建存储目录
-    base_dir = "downloads"
-    novel_dir = os.path.join(base_dir, NOVEL_NAME)
-    os.makedirs(novel_dir, exist_ok=True)
+    logger.info("🚀 启动爬虫，目标: %s", NOVEL_NAME)
     
-    # 2. 初始化并发限制器
-    semaphore = asyncio.Semaphore(CONCURRENCY)
+    # 1. 创建存储目录 (章节文件、断点续传索引、元数据都由 StorageHandler 管理)
+    storage = StorageHandler(NOVEL_NAME, storage_format=site_config.get('storage_format', 'txt'))
     
-    async with aiohttp.ClientSession() as session:
-        # 3. 获取目录页
-        print("正在获取目录列表...")
-        toc_html = await fetch(session, TARGET_URL)
-        if not toc_html:
-            print("❌ 无法访问目录页，程序终止。")
-            return
+    # 2. 复用连接池: HTTP/2 下所有章节请求在同一条连接上多路复用
+    limits = httpx.Limits(
+        max_connections=CONCURRENCY,
+        max_keepalive_connections=CONCURRENCY,
+        keepalive_expiry=60,
+    )
+    timeout = httpx.Timeout(20.0, connect=5.0)
 
-        # 4. 解析目录
-        sel = Selector(text=toc_html)
-        links = sel.css(rules["chapter_list"])
+    # httpx 默认不跟随重定向，小说站常见 http→https、补斜杠、镜像域名跳转，必须打开
+    async with httpx.AsyncClient(
+        http2=HTTP2, limits=limits, headers=headers, timeout=timeout, follow_redirects=True
+    ) as session:
+        # 3. 启动固定数量的下载协程 (队列不设上限: 目录读取不能被下载速度拖住)
+        queue = asyncio.Queue()
+        workers = [
+            asyncio.create_task(worker(queue, session, rules, encoding, storage))
+            for _ in range(CONCURRENCY)
+        ]
         
-        tasks = []
-        print(f"📖 发现 {len(links)} 个章节，准备开始下载...")
-
-        # 生成元数据 (Simple Meta Data)
-        meta_info = {
-            "name": NOVEL_NAME,
-            "url": TARGET_URL,
-            "total_chapters": len(links),
-            "status": "downloading"
-        }
-        with open(os.path.join(novel_dir, "meta.json"), "w", encoding="utf-8") as f:
-            json.dump(meta_info, f, ensure_ascii=False, indent=2)
-
-        # 5. 创建任务队列
-        for idx, link in enumerate(links):
-            # 提取链接
-            href = link.attrib.get(rules["chapter_link_attr"])
-            if not href: continue
+        # 4. 生产者: 独立任务流式读取目录页，每发现一个章节就放入队列 (不用等目录页下载完)
+        logger.info("正在获取目录列表...")
+        toc_task = asyncio.create_task(
+            collect_toc(session, TARGET_URL, rules, encoding, storage, queue, len(workers))
+        )
+        toc_failed = False
+        try:
+            # 目录读完 (下载仍在进行) 就立即生成元数据
+            total, skipped = await toc_task
+            logger.info("📖 目录解析完成，共 %d 个章节", total)
             
-            # 补全 URL
-            full_url = urljoin(TARGET_URL, href)
+            # 生成元数据 (Simple Meta Data)
+            if total:
+                meta_info = {
+                    "name": NOVEL_NAME,
+                    "url": TARGET_URL,
+                    "total_chapters": total,
+                    "status": "downloading"
+                }
+                storage.save_meta(meta_info)
             
-            # 创建任务 (注意：idx+1 是为了让章节序号从1开始)
-            task = asyncio.create_task(
-                download_chapter(session, full_url, idx+1, rules, encoding, semaphore, novel_dir)
-            )
-            tasks.append(task)
+            await asyncio.gather(*workers)
+        except TocUnavailableError as e:
+            toc_failed = True
+            logger.error("❌ 无法访问目录页，程序终止。(%s)", e)
+            return
+        finally:
+            toc_task.cancel()
+            for w in workers:
+                w.cancel()
+            # 补写最后一批未落盘的索引 (目录都没拿到时没有可写的)
+            if not toc_failed:
+                await storage.flush()
         
-        # 6. 执行所有任务
-        if tasks:
-            await asyncio.gather(*tasks)
-        else:
-            print("⚠️ 未找到任何章节链接，请检查 'chapter_list' 规则！")
+        if skipped:
+            logger.info("⏭️ 跳过 %d 个已下载章节", skipped)
+        if not total:
+            logger.warning("⚠️ 未找到任何章节链接，请检查 'chapter_list' 规则！")
 
-    print(f"🎉 全部任务完成！文件保存在: {novel_dir}")
+    logger.info("🎉 全部任务完成！文件保存在: %s", storage.base_dir)
 
 if __name__ == "__main__":
     # Windows 下 Python 3.8+ 需要设置事件循环策略 (防止报错)
     if os.name == 'nt':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-    asyncio.run(main())
\ No newline at end of file
+    else:
+        # 非 Windows 平台优先使用 uvloop (C 实现的事件循环)，没装就用默认的
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
+    asyncio.run(main())
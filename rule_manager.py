@@ -1,18 +1,33 @@
+import logging
 import yaml
 from urllib.parse import urlparse
 
+logger = logging.getLogger(__name__)
+
+# 优先使用 libyaml 的 C 加载器，没装时退回纯 Python 版本
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# 已解析的配置缓存: {config_path: sites}，多个 RuleManager 实例不重复解析
+_config_cache = {}
+
 class RuleManager:
     def __init__(self, config_path="sites.yaml"):
         self.config_path = config_path
         self.sites = self._load_config()
+        # 预先建立 域名 -> 规则 的映射，查找时 O(1)
+        self._by_domain = {d: site for site in self.sites for d in site.get('domains', [])}
 
     def _load_config(self):
         """读取并解析 YAML 配置文件"""
+        if self.config_path in _config_cache:
+            return _config_cache[self.config_path]
         try:
             with open(self.config_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+                sites = yaml.load(f, Loader=_YamlLoader) or []
+            _config_cache[self.config_path] = sites
+            return sites
         except Exception as e:
-            print(f"❌ 配置文件读取失败: {e}")
+            logger.error("❌ 配置文件读取失败: %s", e)
             return []
 
     def get_rule_by_url(self, url):
@@ -22,17 +37,18 @@ class RuleManager:
         """
         parsed_url = urlparse(url)
         domain = parsed_url.netloc  # 例如: www.example.com
-        print(domain)
-        for site in self.sites:
-            if domain in site.get('domains', []):
-                print(f"✅ 匹配到规则模板: {site['name']}")
-                return site
+        logger.debug("解析域名: %s", domain)
+        site = self._by_domain.get(domain)
+        if site:
+            logger.info("✅ 匹配到规则模板: %s", site['name'])
+            return site
         
-        print(f"⚠️ 未找到适配该域名的规则: {domain}")
+        logger.warning("⚠️ 未找到适配该域名的规则: %s", domain)
         return None
 
 # === 测试代码 (直接运行此文件可测试) ===
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     manager = RuleManager()
     
     # 模拟测试
@@ -3,25 +3,79 @@
 # 1. 目录结构：downloads/[作者] 小说名/chapters/
 # 2. 每章保存为单独的文本文件，命名格式：0001_章节标题.txt
 # 3. 索引文件：index.json，记录已下载章节的 URL 和对应的文件名，方便断点续传
+# 4. (可选) storage_format 为 zstd 时章节压缩保存为 .txt.zst，用 read_chapter 读取
 
 
 import os
+import asyncio
 import json
-import re
-import aiofiles
+import orjson
 import logging
+import threading
+
+# zstd 压缩是可选功能，没装 zstandard 时只支持纯文本存储
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
 
 logger = logging.getLogger(__name__)
 
+# 文件名非法字符 (预先生成转换表，str.translate 在 C 层完成替换)
+_BAD_FILENAME_CHARS = str.maketrans({c: '' for c in '\\/*?:"<>|'})
+
+# 章节存储格式 -> 文件扩展名
+CHAPTER_EXTENSIONS = {"txt": ".txt", "zstd": ".txt.zst"}
+ZSTD_LEVEL = 3
+
+# ZstdCompressor 不能被多个线程同时使用，每个写入线程复用自己的一个实例
+_zstd_local = threading.local()
+
+def _get_compressor():
+    cctx = getattr(_zstd_local, "cctx", None)
+    if cctx is None:
+        cctx = _zstd_local.cctx = zstd.ZstdCompressor(level=ZSTD_LEVEL)
+    return cctx
+
+def _write_chapter_file(filepath, title, content):
+    """同步写入单个章节 (一次打开+写入，交给线程池执行)"""
+    with open(filepath, 'w', encoding='utf-8', buffering=1 << 16) as f:
+        f.write(title)
+        f.write("\n\n")
+        f.write(content)
+
+def _write_chapter_zstd(filepath, title, content):
+    """同步压缩并写入单个章节 (zstd 格式，交给线程池执行)"""
+    data = _get_compressor().compress(f"{title}\n\n{content}".encode('utf-8'))
+    with open(filepath, 'wb') as f:
+        f.write(data)
+
 class StorageHandler:
-    def __init__(self, novel_name, author="Unknown"):
+    # 每保存多少章刷新一次 index.json (写回缓存，而不是每章都全量重写)
+    FLUSH_EVERY = 20
+
+    def __init__(self, novel_name, author="Unknown", storage_format="txt"):
         self.novel_name = self._clean_str(novel_name)
         self.author = self._clean_str(author)
         
+        # 0. 章节存储格式: txt (默认) 或 zstd
+        if storage_format not in CHAPTER_EXTENSIONS:
+            logger.warning("⚠️ 不支持的存储格式 %s (可选: %s)，章节改为纯文本保存",
+                           storage_format, ", ".join(CHAPTER_EXTENSIONS))
+            storage_format = "txt"
+        if storage_format == "zstd" and zstd is None:
+            logger.warning("⚠️ 未安装 zstandard，章节改为纯文本保存")
+            storage_format = "txt"
+        self.storage_format = storage_format
+        self._chapter_ext = CHAPTER_EXTENSIONS[storage_format]
+        self._write_chapter = _write_chapter_zstd if storage_format == "zstd" else _write_chapter_file
+        
         # 1. 构建标准目录: downloads/[作者] 小说名/
         # 如果作者名包含 "作 者：" 这种前缀，可以在这里清洗，或者在爬虫里清洗
         self.base_dir = os.path.join("downloads", f"[{self.author}] {self.novel_name}")
         self.chapter_dir = os.path.join(self.base_dir, "chapters")
+        # 章节路径前缀只拼一次，保存时直接字符串拼接
+        self._chapter_dir_prefix = self.chapter_dir + os.sep
         
         # 2. 初始化目录
         os.makedirs(self.chapter_dir, exist_ok=True)
@@ -29,12 +83,15 @@ class StorageHandler:
         # 3. 加载或初始化索引 (用于断点续传)
         self.index_path = os.path.join(self.base_dir, "index.json")
         self.downloaded_chapters = self._load_index()
+        self._dirty_count = 0
+        # 同一时间只允许一个线程写 index.json (共用同一个临时文件)
+        self._index_lock = asyncio.Lock()
 
     def _clean_str(self, s):
         """清洗字符串，去除非法字符"""
         if not s: return "Unknown"
         # 去掉文件名里的非法字符
-        return re.sub(r'[\\/*?:"<>|]', "", s).strip()
+        return s.translate(_BAD_FILENAME_CHARS).strip()
 
     def _load_index(self):
         """读取已下载的章节列表"""
@@ -46,15 +103,49 @@ class StorageHandler:
                 return {}
         return {}
 
+    def _write_index(self, chapters):
+        """原子写入索引: 先写临时文件再替换，防止崩溃时留下半截 JSON (在线程池中执行)"""
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(chapters, option=orjson.OPT_NON_STR_KEYS))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+
+    async def _save_index(self):
+        """把当前索引的快照交给线程池写盘，不阻塞事件循环"""
+        try:
+            async with self._index_lock:
+                await asyncio.to_thread(self._write_index, dict(self.downloaded_chapters))
+        except Exception as e:
+            logger.error("❌ 索引写入失败: %s", e)
+
+    async def flush(self):
+        """把内存中的索引完整写回 index.json (下载结束后调用)"""
+        self._dirty_count = 0
+        await self._save_index()
+
     def save_meta(self, meta_info):
         """保存小说元数据 (meta.json)"""
         path = os.path.join(self.base_dir, "meta.json")
         try:
-            with open(path, 'w', encoding='utf-8') as f:
-                json.dump(meta_info, f, ensure_ascii=False, indent=2)
-            logger.info(f"📚 元数据已保存: {path}")
+            with open(path, 'wb') as f:
+                f.write(orjson.dumps(meta_info, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            logger.info("📚 元数据已保存: %s", path)
         except Exception as e:
-            logger.error(f"元数据保存失败: {e}")
+            logger.error("元数据保存失败: %s", e)
+
+    def read_chapter(self, filename):
+        """读取已保存的章节文本 (.txt.zst 自动解压)"""
+        filepath = self._chapter_dir_prefix + filename
+        if filename.endswith(".zst"):
+            if zstd is None:
+                logger.error("❌ 未安装 zstandard，无法读取压缩章节: %s", filename)
+                return None
+            with open(filepath, 'rb') as f:
+                return zstd.ZstdDecompressor().decompress(f.read()).decode('utf-8')
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return f.read()
 
     def is_downloaded(self, chapter_url):
         """检查该章节是否已经下载过"""
@@ -65,14 +156,12 @@ class StorageHandler:
         保存章节内容，并更新索引
         """
         safe_title = self._clean_str(title)
-        filename = f"{idx:04d}_{safe_title}.txt"
-        filepath = os.path.join(self.chapter_dir, filename)
+        filename = f"{idx:04d}_{safe_title}{self._chapter_ext}"
+        filepath = self._chapter_dir_prefix + filename
 
         try:
-            # 1. 写入文本文件
-            async with aiofiles.open(filepath, 'w', encoding='utf-8') as f:
-                await f.write(f"{title}\n\n")
-                await f.write(content)
+            # 1. 写入章节文件 (纯文本或 zstd 压缩)
+            await asyncio.to_thread(self._write_chapter, filepath, title, content)
             
             # 2. 更新内存中的索引
             self.downloaded_chapters[url] = {
@@ -81,12 +170,14 @@ class StorageHandler:
                 "file": filename
             }
             
-            # 3. (可选) 实时写入索引文件，防止程序崩溃丢失进度
-            # 为了性能，也可以每下载10章存一次，这里为了安全每次都存
-            with open(self.index_path, 'w', encoding='utf-8') as f:
-                json.dump(self.downloaded_chapters, f, ensure_ascii=False)
-                
-            logger.info(f"✅ [{idx}] 保存成功: {title}")
+            logger.info("✅ [%d] 保存成功: %s", idx, title)
             
         except Exception as e:
-            logger.error(f"❌ 写入文件失败: {title} - {e}")
\ No newline at end of file
+            logger.error("❌ 写入文件失败: %s - %s", title, e)
+            return
+        
+        # 3. 批量写入索引文件: 每 FLUSH_EVERY 章落盘一次，结束时由 flush() 补齐
+        #    (索引写失败由 _save_index 单独报告，不影响已写好的章节文件)
+        self._dirty_count += 1
+        if self._dirty_count % self.FLUSH_EVERY == 0:
+            await self._save_index()
\ No newline at end of file